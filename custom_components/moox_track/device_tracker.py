@@ -2,7 +2,7 @@
 from __future__ import annotations
 
 import asyncio
-from datetime import timedelta
+from datetime import datetime, timedelta
 import logging
 
 from pytraccar import (
@@ -85,8 +85,11 @@ from .const import (
 
 _LOGGER = logging.getLogger(__name__)
 
+DEFAULT_HOST = "app.moox.it"
+DEFAULT_PORT = 443
 DEFAULT_SCAN_INTERVAL = timedelta(seconds=30)
 SCAN_INTERVAL = DEFAULT_SCAN_INTERVAL
+GEOFENCE_SCAN_INTERVAL = timedelta(minutes=5)
 
 EVENTS = [
     EVENT_DEVICE_MOVING,
@@ -108,22 +111,21 @@ EVENTS = [
     EVENT_ALL_EVENTS,
 ]
 
+# Traccar report event types (camelCase) mapped to their configuration names
+EVENT_TYPES = {camelcase(event): event for event in EVENTS}
+
 # MOOX Funzione per aggiungere condizioni di monitoraggio predefinite.
 # Questa funzione garantisce che 'power' e 'ignition' siano inclusi nelle condizioni monitorate,
 # aggiungendoli all'elenco se non sono già presenti.
 def add_default_conditions(conditions):
-    default_conditions = ['power', 'ignition', 'odometer']
-    for condition in default_conditions:
-        if condition not in conditions:
-            conditions.append(condition)
-    return conditions
+    return list(dict.fromkeys([*conditions, 'power', 'ignition', 'odometer']))
 
 PLATFORM_SCHEMA = PARENT_PLATFORM_SCHEMA.extend(
     {
         vol.Required(CONF_PASSWORD): cv.string,
         vol.Required(CONF_USERNAME): cv.string,
-        vol.Optional(CONF_HOST, default="app.moox.it"): cv.string,
-        vol.Optional(CONF_PORT, default=443): cv.port,
+        vol.Optional(CONF_HOST, default=DEFAULT_HOST): cv.string,
+        vol.Optional(CONF_PORT, default=DEFAULT_PORT): cv.port,
         vol.Optional(CONF_SSL, default=True): cv.boolean,
         vol.Optional(CONF_VERIFY_SSL, default=True): cv.boolean,
         vol.Required(CONF_MAX_ACCURACY, default=0): cv.positive_int,
@@ -170,20 +172,20 @@ async def async_setup_entry(
     dev_reg = dr.async_get(hass)
     dev_ids = {
         identifier[1]
-        for device in dev_reg.devices.values()
+        for device in dr.async_entries_for_config_entry(dev_reg, entry.entry_id)
         for identifier in device.identifiers
         if identifier[0] == DOMAIN
     }
     if not dev_ids:
         return
 
-    entities = []
-    for dev_id in dev_ids:
-        hass.data[DOMAIN]["devices"].add(dev_id)
-        entity = moox_trackEntity(dev_id, None, None, None, None, None)
-        entities.append(entity)
-
-    async_add_entities(entities)
+    hass.data[DOMAIN]["devices"].update(dev_ids)
+    async_add_entities(
+        [
+            moox_trackEntity(dev_id, None, None, None, None, None)
+            for dev_id in dev_ids
+        ]
+    )
 
 
 async def async_setup_scanner(
@@ -226,7 +228,7 @@ class moox_trackScanner:
         async_see: AsyncSeeCallback,
         scan_interval: timedelta,
         max_accuracy: int,
-        skip_accuracy_on: bool,
+        skip_accuracy_on: list[str],
         custom_attributes: list[str],
         event_types: list[str],
     ) -> None:
@@ -234,17 +236,26 @@ class moox_trackScanner:
 
         if EVENT_ALL_EVENTS in event_types:
             event_types = EVENTS
-        self._event_types = {camelcase(evt): evt for evt in event_types}
-        self._custom_attributes = custom_attributes
+        self._event_types = {
+            event_type: event
+            for event_type, event in EVENT_TYPES.items()
+            if event in event_types
+        }
+        self._custom_attributes = tuple(custom_attributes)
         self._scan_interval = scan_interval
         self._async_see = async_see
         self._api = api
         self._hass = hass
         self._max_accuracy = max_accuracy
-        self._skip_accuracy_on = skip_accuracy_on
+        # Only monitored attributes can lift the accuracy filter
+        self._skip_accuracy_on = frozenset(skip_accuracy_on).intersection(
+            custom_attributes
+        )
         self._devices: list[DeviceModel] = []
         self._positions: list[PositionModel] = []
         self._geofences: list[GeofenceModel] = []
+        self._geofences_updated: datetime | None = None
+        self._missing_geofence_ids: set[int] = set()
 
     async def async_init(self):
         """Further initialize connection to moox_track."""
@@ -266,64 +277,84 @@ class moox_trackScanner:
     async def _async_update(self, now=None):
         """Update info from moox_track."""
         _LOGGER.debug("Updating device data")
+        utcnow = dt_util.utcnow()
+        # Geofences change rarely, so they are refreshed on a slower cadence
+        update_geofences = (
+            self._geofences_updated is None
+            or utcnow - self._geofences_updated >= GEOFENCE_SCAN_INTERVAL
+        )
+        requests = [self._api.get_devices(), self._api.get_positions()]
+        if update_geofences:
+            _LOGGER.debug("Updating geofence data")
+            requests.append(self._api.get_geofences())
+
         try:
-            (
-                self._devices,
-                self._positions,
-                self._geofences,
-            ) = await asyncio.gather(
-                self._api.get_devices(),
-                self._api.get_positions(),
-                self._api.get_geofences(),
+            self._devices, self._positions, *geofences = await asyncio.gather(
+                *requests
             )
         except TraccarException as ex:
             _LOGGER.error("Error while updating device data: %s", ex)
             return
 
+        if update_geofences:
+            self._geofences = geofences[0]
+            self._geofences_updated = utcnow
+            self._missing_geofence_ids = self._unknown_geofence_ids()
+        elif not self._unknown_geofence_ids() <= self._missing_geofence_ids:
+            # A device reports a geofence created since the last refresh
+            await self._async_update_geofences(utcnow)
+
         self._hass.async_create_task(self.import_device_data())
         if self._event_types:
             self._hass.async_create_task(self.import_events())
 
+    async def _async_update_geofences(self, utcnow):
+        """Refresh geofences ahead of schedule, keeping the cache on failure."""
+        _LOGGER.debug("Updating geofence data")
+        try:
+            self._geofences = await self._api.get_geofences()
+        except TraccarException as ex:
+            _LOGGER.error("Error while updating geofence data: %s", ex)
+        else:
+            self._geofences_updated = utcnow
+        # Ids still unknown now do not trigger another early refresh
+        self._missing_geofence_ids = self._unknown_geofence_ids()
+
+    def _unknown_geofence_ids(self) -> set[int]:
+        """Return geofence ids referenced by devices but missing from the cache."""
+        known_ids = {geofence.id for geofence in self._geofences}
+        return {
+            geofence_id
+            for device in self._devices
+            for geofence_id in device.geofence_ids or ()
+            if geofence_id not in known_ids
+        }
+
     async def import_device_data(self):
         """Import device data from moox_track."""
+        devices = {device.id: device for device in self._devices}
+        geofence_names = {geofence.id: geofence.name for geofence in self._geofences}
+
         for position in self._positions:
-            device = next(
-                (dev for dev in self._devices if dev.id == position.device_id), None
-            )
+            device = devices.get(position.device_id)
 
             if not device:
                 continue
 
-            attr = {
-                ATTR_TRACKER: "moox_track",
-                ATTR_ADDRESS: position.address,
-                ATTR_SPEED: position.speed,
-                ATTR_ALTITUDE: position.altitude,
-                ATTR_MOTION: position.attributes.get("motion", False),
-                ATTR_moox_track_ID: device.id,
-                ATTR_GEOFENCE: next(
-                    (
-                        geofence.name
-                        for geofence in self._geofences
-                        if geofence.id in (device.geofence_ids or [])
-                    ),
-                    None,
-                ),
-                ATTR_CATEGORY: device.category,
-                ATTR_STATUS: device.status,
-            }
-
+            custom_attrs = {}
             skip_accuracy_filter = False
+            device_attributes = device.attributes
+            position_attributes = position.attributes
 
             for custom_attr in self._custom_attributes:
-                if device.attributes.get(custom_attr) is not None:
-                    attr[custom_attr] = position.attributes[custom_attr]
-                    if custom_attr in self._skip_accuracy_on:
-                        skip_accuracy_filter = True
-                if position.attributes.get(custom_attr) is not None:
-                    attr[custom_attr] = position.attributes[custom_attr]
-                    if custom_attr in self._skip_accuracy_on:
-                        skip_accuracy_filter = True
+                value = position_attributes.get(custom_attr)
+                if value is None:
+                    value = device_attributes.get(custom_attr)
+                if value is None:
+                    continue
+                custom_attrs[custom_attr] = value
+                if not skip_accuracy_filter and custom_attr in self._skip_accuracy_on:
+                    skip_accuracy_filter = True
 
             accuracy = position.accuracy or 0.0
             if (
@@ -334,42 +365,63 @@ class moox_trackScanner:
                 _LOGGER.debug(
                     "Excluded position by accuracy filter: %f (%s)",
                     accuracy,
-                    attr[ATTR_moox_track_ID],
+                    device.id,
                 )
                 continue
 
+            attr = {
+                ATTR_TRACKER: "moox_track",
+                ATTR_ADDRESS: position.address,
+                ATTR_SPEED: position.speed,
+                ATTR_ALTITUDE: position.altitude,
+                ATTR_MOTION: position_attributes.get("motion", False),
+                ATTR_moox_track_ID: device.id,
+                ATTR_GEOFENCE: next(
+                    (
+                        geofence_names[geofence_id]
+                        for geofence_id in device.geofence_ids or ()
+                        if geofence_id in geofence_names
+                    ),
+                    None,
+                ),
+                ATTR_CATEGORY: device.category,
+                ATTR_STATUS: device.status,
+                **custom_attrs,
+            }
+
             await self._async_see(
                 dev_id=slugify(device.name),
                 gps=(position.latitude, position.longitude),
                 gps_accuracy=accuracy,
-                battery=position.attributes.get("batteryLevel", -1),
+                battery=position_attributes.get("batteryLevel", -1),
                 attributes=attr,
             )
 
     async def import_events(self):
         """Import events from moox_track."""
+        if not self._event_types:
+            return
+
+        device_names = {device.id: device.name for device in self._devices}
+        if not device_names:
+            return
+
         # get_reports_events requires naive UTC datetimes as of 1.0.0
-        start_intervel = dt_util.utcnow().replace(tzinfo=None)
+        end_time = dt_util.utcnow().replace(tzinfo=None)
         events = await self._api.get_reports_events(
-            devices=[device.id for device in self._devices],
-            start_time=start_intervel,
-            end_time=start_intervel - self._scan_interval,
-            event_types=self._event_types.keys(),
+            devices=list(device_names),
+            start_time=end_time - self._scan_interval,
+            end_time=end_time,
+            event_types=list(self._event_types),
         )
         if events is not None:
+            fire = self._hass.bus.async_fire
             for event in events:
-                self._hass.bus.async_fire(
+                fire(
                     f"moox_track_{self._event_types.get(event.type)}",
                     {
                         "device_moox_track_id": event.device_id,
-                        "device_name": next(
-                            (
-                                dev.name
-                                for dev in self._devices
-                                if dev.id == event.device_id
-                            ),
-                            None,
-                        ),
+                        "device_name": device_names.get(event.device_id),
                         "type": event.type,
                         "serverTime": event.event_time,
                         "attributes": event.attributes,